@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User
 
@@ -9,14 +10,14 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Authenticate user by API key (Bearer token).
     """
     api_key = credentials.credentials
 
-    user = db.query(User).filter(User.api_key == api_key).first()
+    user = await db.scalar(select(User).where(User.api_key == api_key))
 
     if not user:
         raise HTTPException(
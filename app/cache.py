@@ -0,0 +1,72 @@
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.config import settings
+
+redis_client: Optional[Redis] = Redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """
+    Fetch a JSON value from Redis.
+
+    Returns None on a miss, when caching is disabled, or if Redis is unavailable.
+    """
+    if redis_client is None:
+        return None
+
+    try:
+        raw = await redis_client.get(key)
+    except RedisError:
+        # Redis outages fall through to the upstream call
+        return None
+
+    return json.loads(raw) if raw is not None else None
+
+
+async def cache_set(key: str, ttl: int, value: Any) -> None:
+    """Store a JSON value in Redis with a TTL in seconds (best effort)."""
+    if redis_client is None:
+        return
+
+    try:
+        await redis_client.setex(key, ttl, json.dumps(value, default=str))
+    except RedisError:
+        pass
+
+
+@asynccontextmanager
+async def cache_lock(key: str, timeout: int) -> AsyncIterator[bool]:
+    """
+    Non-blocking distributed lock guarding the refresh of a cache key.
+
+    Yields True if this worker should refresh the key (it holds the lock, or
+    Redis is unavailable so there is nothing to coordinate with) and False if
+    another worker is already refreshing it. The lock expires after `timeout`
+    seconds in case its holder dies.
+    """
+    lock = None
+    if redis_client is not None:
+        lock = redis_client.lock(f"lock:{key}", timeout=timeout)
+        try:
+            acquired = await lock.acquire(blocking=False)
+        except RedisError:
+            lock = None
+        else:
+            # Yield outside the try, so a RedisError raised by the caller's
+            # block is propagated rather than treated as a failed acquire
+            if not acquired:
+                yield False
+                return
+
+    try:
+        yield True
+    finally:
+        if lock is not None:
+            try:
+                await lock.release()
+            except RedisError:
+                # Lock already expired or Redis went away; it will time out on its own
+                pass
@@ -1,11 +1,16 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env")
+
     # Database
     DATABASE_URL: str
 
+    # Create missing tables at startup (prefer scripts.init_db / migrations in production)
+    RUN_MIGRATIONS: bool = False
+
     # Alpha Vantage
     ALPHA_VANTAGE_API_KEY: str
 
@@ -18,14 +23,19 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
 
+    # Cache (Redis caching is disabled when REDIS_URL is unset)
+    REDIS_URL: Optional[str] = None
+    CACHE_TTL_STOCK_PRICE: int = 5
+    CACHE_TTL_CRYPTO_PRICE: int = 2
+    CACHE_TTL_FOREX_PRICE: int = 30
+    CACHE_TTL_INTRADAY_HISTORY: int = 60
+    CACHE_TTL_DAILY_HISTORY: int = 3600
+
     # Trading
     DEFAULT_BALANCE: float = 100000.00
     STOCK_TRANSACTION_FEE: float = 0.0
     CRYPTO_TRANSACTION_FEE: float = 0.0
     FOREX_TRANSACTION_FEE: float = 0.0
 
-    class Config:
-        env_file = ".env"
-
 
 settings = Settings()
@@ -1,18 +1,70 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 
+# Synchronous engine for scripts and schema management
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers used by the API for each configured backend
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(url: str):
+    """Swap the driver in a sync DATABASE_URL for its asyncio counterpart."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def _async_engine_options(url) -> dict:
+    """Connection pool settings for the API engine."""
+    if url.get_backend_name() == 'sqlite':
+        # In-memory databases live and die with their single connection
+        if url.database in (None, '', ':memory:'):
+            return {}
+        # Keep file connections open so the per-connection pragmas below are paid once
+        return {'poolclass': AsyncAdaptedQueuePool, 'pool_size': 10}
+    return {'pool_size': 10, 'max_overflow': 20, 'pool_pre_ping': True}
+
+
+_async_url = async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **_async_engine_options(_async_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if _async_url.get_backend_name() == 'sqlite':
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers don't block on the writer, and fsync only at checkpoints."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for getting database session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def dialect_insert(bind, table):
+    """
+    Return an INSERT for `table` supporting ON CONFLICT on the bind's dialect.
+
+    PostgreSQL and SQLite share the on_conflict_do_nothing/on_conflict_do_update
+    API, so callers can write one upsert that runs against either database.
+    """
+    if bind.dialect.name == 'sqlite':
+        return sqlite.insert(table)
+    return postgresql.insert(table)
@@ -1,18 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import router
-from app.database import engine, Base
+from app.database import async_engine, Base
 from app.config import settings
+from app.market_data import create_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create tables if enabled and hold one pooled HTTP client for market data."""
+    if settings.RUN_MIGRATIONS:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    app.state.http = create_client()
+    try:
+        yield
+    finally:
+        # Close pooled HTTP and database connections
+        await app.state.http.aclose()
+        await async_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Stock Trading API",
     description="Simulated stock trading API for algorithmic trading model training",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -37,6 +54,7 @@ async def root():
         "description": "Simulated trading API for algorithmic trading",
         "endpoints": {
             "price": "/api/price",
+            "prices": "/api/prices",
             "trade": "/api/trade",
             "balance": "/api/balance",
             "holdings": "/api/holdings",
@@ -1,382 +1,547 @@
+import asyncio
+import calendar
+import heapq
+import re
+import time
 import httpx
+import orjson
+from fastapi import Request
 from typing import Optional, List, Dict
-from datetime import datetime, timedelta
-import pytz
+from functools import lru_cache
+from operator import itemgetter
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from app.config import settings
 from app.models import MarketType
-
-
-class MarketDataService:
-    """Service for fetching market data from Alpha Vantage."""
-
-    BASE_URL = "https://www.alphavantage.co/query"
-
-    # Symbol detection patterns
-    CRYPTO_SYMBOLS = ['BTC', 'ETH', 'USDT', 'BNB', 'XRP', 'ADA', 'DOGE', 'SOL', 'TRX', 'DOT']
-    FOREX_PAIRS = ['EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD', 'CNY']
-
-    @classmethod
-    def detect_market(cls, symbol: str) -> MarketType:
-        """Detect market type from symbol."""
-        symbol_upper = symbol.upper()
-
-        # Check if it's a known crypto
-        if symbol_upper in cls.CRYPTO_SYMBOLS:
-            return MarketType.CRYPTO
-
-        # Check if it's a forex pair (typically 6 characters like EURUSD)
-        if len(symbol_upper) == 6 and symbol_upper[:3] in cls.FOREX_PAIRS:
-            return MarketType.FOREX
-
-        # Default to stock
-        return MarketType.STOCK
-
-    @classmethod
-    async def get_price(cls, symbol: str, market: Optional[MarketType] = None) -> Dict:
-        """
-        Fetch current price for a symbol.
-
-        Args:
-            symbol: The ticker symbol
-            market: Market type (auto-detected if not provided)
-
-        Returns:
-            Dict with price, market, source, and timestamp
-        """
-        if market is None:
-            market = cls.detect_market(symbol)
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            if market == MarketType.CRYPTO:
-                return await cls._get_crypto_price(client, symbol)
-            elif market == MarketType.FOREX:
-                return await cls._get_forex_price(client, symbol)
-            else:
-                return await cls._get_stock_price(client, symbol)
-
-    @classmethod
-    async def _get_stock_price(cls, client: httpx.AsyncClient, symbol: str) -> Dict:
-        """Fetch stock price from Alpha Vantage."""
-        params = {
-            'function': 'GLOBAL_QUOTE',
-            'symbol': symbol,
-            'apikey': settings.ALPHA_VANTAGE_API_KEY
-        }
-
-        response = await client.get(cls.BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'Global Quote' not in data or not data['Global Quote']:
-            raise ValueError(f"No data found for symbol {symbol}")
-
-        quote = data['Global Quote']
-        price = float(quote.get('05. price', 0))
-
-        return {
-            'symbol': symbol,
-            'market': MarketType.STOCK,
-            'price': price,
-            'source': 'alpha_vantage',
-            'timestamp': datetime.now(pytz.UTC)
-        }
-
-    @classmethod
-    async def _get_crypto_price(cls, client: httpx.AsyncClient, symbol: str) -> Dict:
-        """Fetch crypto price from Alpha Vantage."""
-        params = {
-            'function': 'CURRENCY_EXCHANGE_RATE',
-            'from_currency': symbol,
-            'to_currency': 'USD',
-            'apikey': settings.ALPHA_VANTAGE_API_KEY
-        }
-
-        response = await client.get(cls.BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'Realtime Currency Exchange Rate' not in data:
-            raise ValueError(f"No data found for crypto {symbol}")
-
-        rate = data['Realtime Currency Exchange Rate']
-        price = float(rate.get('5. Exchange Rate', 0))
-
-        return {
-            'symbol': symbol,
-            'market': MarketType.CRYPTO,
-            'price': price,
-            'source': 'alpha_vantage',
-            'timestamp': datetime.now(pytz.UTC)
-        }
-
-    @classmethod
-    async def _get_forex_price(cls, client: httpx.AsyncClient, symbol: str) -> Dict:
-        """Fetch forex price from Alpha Vantage."""
-        # Symbol should be like EURUSD - split to from/to
-        from_currency = symbol[:3]
-        to_currency = symbol[3:6]
-
-        params = {
-            'function': 'CURRENCY_EXCHANGE_RATE',
-            'from_currency': from_currency,
-            'to_currency': to_currency,
-            'apikey': settings.ALPHA_VANTAGE_API_KEY
-        }
-
-        response = await client.get(cls.BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'Realtime Currency Exchange Rate' not in data:
-            raise ValueError(f"No data found for forex {symbol}")
-
-        rate = data['Realtime Currency Exchange Rate']
-        price = float(rate.get('5. Exchange Rate', 0))
-
-        return {
-            'symbol': symbol,
-            'market': MarketType.FOREX,
-            'price': price,
-            'source': 'alpha_vantage',
-            'timestamp': datetime.now(pytz.UTC)
-        }
-
-    @classmethod
-    async def get_historical_data(
-        cls,
-        symbol: str,
-        resolution: str,
-        limit: int = 500,
-        market: Optional[MarketType] = None
-    ) -> List[Dict]:
-        """
-        Fetch historical OHLCV data.
-
-        Args:
-            symbol: The ticker symbol
-            resolution: Time resolution (1, 5, 15, 30, 60, D, W, M)
-            limit: Number of candles to return
-            market: Market type (auto-detected if not provided)
-
-        Returns:
-            List of candle dictionaries
-        """
-        if market is None:
-            market = cls.detect_market(symbol)
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            if market == MarketType.STOCK:
-                return await cls._get_stock_history(client, symbol, resolution, limit)
-            elif market == MarketType.CRYPTO:
-                return await cls._get_crypto_history(client, symbol, resolution, limit)
-            else:
-                return await cls._get_forex_history(client, symbol, resolution, limit)
-
-    @classmethod
-    async def _get_stock_history(
-        cls,
-        client: httpx.AsyncClient,
-        symbol: str,
-        resolution: str,
-        limit: int
-    ) -> List[Dict]:
-        """Fetch stock historical data."""
-        # Map resolution to Alpha Vantage function
-        if resolution in ['1', '5', '15', '30', '60']:
-            function = 'TIME_SERIES_INTRADAY'
-            interval = f"{resolution}min"
-            params = {
-                'function': function,
-                'symbol': symbol,
-                'interval': interval,
-                'apikey': settings.ALPHA_VANTAGE_API_KEY,
-                'outputsize': 'full'
-            }
-            time_series_key = f'Time Series ({interval})'
-        elif resolution == 'D':
-            function = 'TIME_SERIES_DAILY'
-            params = {
-                'function': function,
-                'symbol': symbol,
-                'apikey': settings.ALPHA_VANTAGE_API_KEY,
-                'outputsize': 'full'
-            }
-            time_series_key = 'Time Series (Daily)'
-        elif resolution == 'W':
-            function = 'TIME_SERIES_WEEKLY'
-            params = {
-                'function': function,
-                'symbol': symbol,
-                'apikey': settings.ALPHA_VANTAGE_API_KEY
-            }
-            time_series_key = 'Weekly Time Series'
-        elif resolution == 'M':
-            function = 'TIME_SERIES_MONTHLY'
-            params = {
-                'function': function,
-                'symbol': symbol,
-                'apikey': settings.ALPHA_VANTAGE_API_KEY
-            }
-            time_series_key = 'Monthly Time Series'
-        else:
-            raise ValueError(f"Unsupported resolution: {resolution}")
-
-        response = await client.get(cls.BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if time_series_key not in data:
-            raise ValueError(f"No historical data found for {symbol}")
-
-        time_series = data[time_series_key]
-
-        # Convert to list of candles
-        candles = []
-        for timestamp_str, values in sorted(time_series.items(), reverse=True)[:limit]:
-            timestamp = datetime.fromisoformat(timestamp_str.replace(' ', 'T'))
-            if timestamp.tzinfo is None:
-                timestamp = pytz.UTC.localize(timestamp)
-
-            candles.append({
-                'timestamp': int(timestamp.timestamp()),
-                'open': float(values['1. open']),
-                'high': float(values['2. high']),
-                'low': float(values['3. low']),
-                'close': float(values['4. close']),
-                'volume': float(values['5. volume'])
-            })
-
-        return list(reversed(candles))  # Return in chronological order
-
-    @classmethod
-    async def _get_crypto_history(
-        cls,
-        client: httpx.AsyncClient,
-        symbol: str,
-        resolution: str,
-        limit: int
-    ) -> List[Dict]:
-        """Fetch crypto historical data."""
-        # Alpha Vantage has limited intraday crypto support
-        # For now, use daily data
-        params = {
-            'function': 'DIGITAL_CURRENCY_DAILY',
-            'symbol': symbol,
-            'market': 'USD',
-            'apikey': settings.ALPHA_VANTAGE_API_KEY
-        }
-
-        response = await client.get(cls.BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        time_series_key = 'Time Series (Digital Currency Daily)'
-        if time_series_key not in data:
-            raise ValueError(f"No historical data found for {symbol}")
-
-        time_series = data[time_series_key]
-
-        candles = []
-        for timestamp_str, values in sorted(time_series.items(), reverse=True)[:limit]:
-            timestamp = datetime.fromisoformat(timestamp_str)
-            if timestamp.tzinfo is None:
-                timestamp = pytz.UTC.localize(timestamp)
-
-            candles.append({
-                'timestamp': int(timestamp.timestamp()),
-                'open': float(values['1a. open (USD)']),
-                'high': float(values['2a. high (USD)']),
-                'low': float(values['3a. low (USD)']),
-                'close': float(values['4a. close (USD)']),
-                'volume': float(values['5. volume'])
-            })
-
-        return list(reversed(candles))
-
-    @classmethod
-    async def _get_forex_history(
-        cls,
-        client: httpx.AsyncClient,
-        symbol: str,
-        resolution: str,
-        limit: int
-    ) -> List[Dict]:
-        """Fetch forex historical data."""
-        from_currency = symbol[:3]
-        to_currency = symbol[3:6]
-
-        # Map resolution to function
-        if resolution in ['1', '5', '15', '30', '60']:
-            function = 'FX_INTRADAY'
-            interval = f"{resolution}min"
-            params = {
-                'function': function,
-                'from_symbol': from_currency,
-                'to_symbol': to_currency,
-                'interval': interval,
-                'apikey': settings.ALPHA_VANTAGE_API_KEY,
-                'outputsize': 'full'
-            }
-            time_series_key = f'Time Series FX (Intraday)'
-        else:
-            function = 'FX_DAILY'
-            params = {
-                'function': function,
-                'from_symbol': from_currency,
-                'to_symbol': to_currency,
-                'apikey': settings.ALPHA_VANTAGE_API_KEY,
-                'outputsize': 'full'
-            }
-            time_series_key = 'Time Series FX (Daily)'
-
-        response = await client.get(cls.BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if time_series_key not in data:
-            raise ValueError(f"No historical data found for {symbol}")
-
-        time_series = data[time_series_key]
-
-        candles = []
-        for timestamp_str, values in sorted(time_series.items(), reverse=True)[:limit]:
-            timestamp = datetime.fromisoformat(timestamp_str.replace(' ', 'T'))
-            if timestamp.tzinfo is None:
-                timestamp = pytz.UTC.localize(timestamp)
-
-            candles.append({
-                'timestamp': int(timestamp.timestamp()),
-                'open': float(values['1. open']),
-                'high': float(values['2. high']),
-                'low': float(values['3. low']),
-                'close': float(values['4. close']),
-                'volume': 0  # Forex doesn't have volume in Alpha Vantage
-            })
-
-        return list(reversed(candles))
-
-    @classmethod
-    def is_market_open(cls, market: MarketType) -> bool:
-        """
-        Check if market is currently open for trading.
-
-        Note: This is a simplified implementation.
-        For production, consider holidays and exact trading hours.
-        """
-        now = datetime.now(pytz.timezone('US/Eastern'))
+from app.cache import cache_get, cache_set, cache_lock
+
+# Timezones are resolved once at import
+ET = ZoneInfo('America/New_York')  # US stock market
+UTC = timezone.utc
+
+# Alpha Vantage OHLCV field names
+OPEN_KEY = '1. open'
+HIGH_KEY = '2. high'
+LOW_KEY = '3. low'
+CLOSE_KEY = '4. close'
+VOLUME_KEY = '5. volume'
+CRYPTO_OPEN_KEY = '1a. open (USD)'
+CRYPTO_HIGH_KEY = '2a. high (USD)'
+CRYPTO_LOW_KEY = '3a. low (USD)'
+CRYPTO_CLOSE_KEY = '4a. close (USD)'
+
+BASE_URL = "https://www.alphavantage.co/query"
+
+# Alpha Vantage's "compact" output returns only the latest 100 data points
+COMPACT_SIZE = 100
+
+# History request parameters per canonical resolution, built once at import so
+# requests only add the symbol, API key and output size.
+# Stock: resolution -> (static params, time series key, accepts outputsize)
+INTRADAY_RESOLUTIONS = ('1', '5', '15', '30', '60')
+STOCK_HISTORY_PARAMS = {
+    **{
+        r: ({'function': 'TIME_SERIES_INTRADAY', 'interval': f'{r}min'}, f'Time Series ({r}min)', True)
+        for r in INTRADAY_RESOLUTIONS
+    },
+    'D': ({'function': 'TIME_SERIES_DAILY'}, 'Time Series (Daily)', True),
+    'W': ({'function': 'TIME_SERIES_WEEKLY'}, 'Weekly Time Series', False),
+    'M': ({'function': 'TIME_SERIES_MONTHLY'}, 'Monthly Time Series', False),
+}
+
+# Forex: intraday resolutions -> (static params, time series key); anything else is daily
+FOREX_HISTORY_PARAMS = {
+    r: ({'function': 'FX_INTRADAY', 'interval': f'{r}min'}, 'Time Series FX (Intraday)')
+    for r in INTRADAY_RESOLUTIONS
+}
+FOREX_DAILY_PARAMS = ({'function': 'FX_DAILY'}, 'Time Series FX (Daily)')
+
+# Price fetches currently in flight, keyed like the price cache
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Cross-worker refresh lock lifetime and how often waiting workers re-check the cache (seconds)
+PRICE_LOCK_TIMEOUT = 5
+PRICE_POLL_INTERVAL = 0.1
+
+# Symbol detection patterns (frozensets for O(1) hash lookups)
+CRYPTO_SYMBOLS = frozenset({'BTC', 'ETH', 'USDT', 'BNB', 'XRP', 'ADA', 'DOGE', 'SOL', 'TRX', 'DOT'})
+FOREX_PAIRS = frozenset({'EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'CAD', 'NZD', 'CNY'})
+
+# Forex pair: known base currency followed by a three-letter quote currency (e.g. EURUSD)
+FOREX_PATTERN = re.compile(r"(?:" + "|".join(sorted(FOREX_PAIRS)) + r")[A-Z]{3}")
+
+
+@lru_cache(maxsize=8192)
+def _day_epoch(date_str: str) -> int:
+    """Unix seconds at UTC midnight for a 'YYYY-MM-DD' date."""
+    return calendar.timegm((int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10]), 0, 0, 0))
+
+
+def _parse_timestamp(timestamp_str: str) -> int:
+    """
+    Convert an Alpha Vantage 'YYYY-MM-DD[ HH:MM:SS]' timestamp (treated as UTC) to Unix seconds.
+
+    The layout is fixed, so fields are sliced directly instead of going through
+    datetime parsing; intraday bars share a date, so the date part is memoized.
+    """
+    epoch = _day_epoch(timestamp_str[:10])
+    if len(timestamp_str) > 10:
+        epoch += (
+            int(timestamp_str[11:13]) * 3600
+            + int(timestamp_str[14:16]) * 60
+            + int(timestamp_str[17:19] or 0)
+        )
+    return epoch
+
+
+@lru_cache(maxsize=1024)
+def _is_open_at(market: MarketType, minute_bucket: int) -> bool:
+    """Check if market is open during the given minute (Unix seconds // 60)."""
+    now = datetime.fromtimestamp(minute_bucket * 60, ET)
+
+    if market == MarketType.CRYPTO:
+        # Crypto markets are always open
+        return True
+    elif market == MarketType.FOREX:
+        # Forex is open 24/5 (closed weekends)
+        return now.weekday() < 5
+    else:  # STOCK
+        # US stock market: Mon-Fri, 9:30 AM - 4:00 PM ET
+        if now.weekday() >= 5:  # Weekend
+            return False
+
+        market_open = now.replace(hour=9, minute=30, second=0, microsecond=0)
+        market_close = now.replace(hour=16, minute=0, second=0, microsecond=0)
+
+        # `now` is the start of its minute, so the 16:00 minute is already closed
+        return market_open <= now < market_close
+
+
+@lru_cache(maxsize=4096)
+def detect_market(symbol: str) -> MarketType:
+    """Detect market type from symbol (memoized; the result depends only on the symbol)."""
+    symbol_upper = symbol.upper()
+
+    # Check if it's a known crypto
+    if symbol_upper in CRYPTO_SYMBOLS:
+        return MarketType.CRYPTO
+
+    # Check if it's a forex pair (typically 6 characters like EURUSD)
+    if FOREX_PATTERN.fullmatch(symbol_upper):
+        return MarketType.FOREX
+
+    # Default to stock
+    return MarketType.STOCK
+
+
+def create_client() -> httpx.AsyncClient:
+    """
+    Create the pooled HTTP client shared by all market data requests.
+
+    Keep-alive connections are reused across requests, so only the first
+    call pays for the TCP/TLS handshake with Alpha Vantage.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+    )
+
+
+async def get_price(
+    client: httpx.AsyncClient,
+    symbol: str,
+    market: Optional[MarketType] = None
+) -> Dict:
+    """
+    Fetch current price for a symbol.
+
+    Args:
+        client: Shared HTTP client (see `get_http_client`)
+        symbol: The ticker symbol
+        market: Market type (auto-detected if not provided)
+
+    Returns:
+        Dict with price, market, source, and timestamp, plus `cached`: True
+        when it was served from the cache or from another caller's fetch
+        rather than fetched upstream by this call
+    """
+    return await _dispatch(client, symbol, market)
+
+
+async def get_prices(client: httpx.AsyncClient, symbols: List[str]) -> List:
+    """
+    Fetch current prices for several symbols concurrently.
+
+    All requests share one HTTP client, so total latency is roughly that of
+    the slowest symbol rather than the sum of all of them.
+
+    Args:
+        client: Shared HTTP client (see `get_http_client`)
+        symbols: The ticker symbols (market type is auto-detected per symbol)
+
+    Returns:
+        List aligned with `symbols` holding either a price dict or the
+        exception raised while fetching that symbol
+    """
+    return await asyncio.gather(
+        *[_dispatch(client, symbol) for symbol in symbols],
+        return_exceptions=True
+    )
+
+
+async def _dispatch(
+    client: httpx.AsyncClient,
+    symbol: str,
+    market: Optional[MarketType] = None
+) -> Dict:
+    """Fetch a price through the cache, routing to the market-specific fetcher."""
+    if market is None:
+        market = detect_market(symbol)
+
+    key = f"price:{market.value}:{symbol}"
+    cached = await cache_get(key)
+    if cached is not None:
+        return _decode_cached_price(cached)
+
+    # Single-flight: concurrent misses for the same key share one upstream fetch
+    task = _inflight.get(key)
+    joined = task is not None
+    if not joined:
+        task = asyncio.ensure_future(_fetch_price(client, key, symbol, market))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # Shielded so one caller's cancellation doesn't cancel the fetch for the others
+    result = await asyncio.shield(task)
+    # Only the caller that started the fetch sees it as fresh
+    return {**result, 'cached': True} if joined else result
+
+
+async def _fetch_price(
+    client: httpx.AsyncClient,
+    key: str,
+    symbol: str,
+    market: MarketType
+) -> Dict:
+    """Fetch a price from the market-specific endpoint and cache it under `key`."""
+    # Across workers, only the lock holder refreshes; the rest wait for its result
+    async with cache_lock(key, PRICE_LOCK_TIMEOUT) as refresh:
+        if not refresh:
+            cached = await _wait_for_cached_price(key)
+            if cached is not None:
+                return cached
 
         if market == MarketType.CRYPTO:
-            # Crypto markets are always open
-            return True
+            result = await _get_crypto_price(client, symbol)
         elif market == MarketType.FOREX:
-            # Forex is open 24/5 (closed weekends)
-            return now.weekday() < 5
-        else:  # STOCK
-            # US stock market: Mon-Fri, 9:30 AM - 4:00 PM ET
-            if now.weekday() >= 5:  # Weekend
-                return False
-
-            market_open = now.replace(hour=9, minute=30, second=0, microsecond=0)
-            market_close = now.replace(hour=16, minute=0, second=0, microsecond=0)
-
-            return market_open <= now <= market_close
+            result = await _get_forex_price(client, symbol)
+        else:
+            result = await _get_stock_price(client, symbol)
+
+        await cache_set(key, _price_ttl(market), result)
+        return result
+
+
+async def _wait_for_cached_price(key: str) -> Optional[Dict]:
+    """Poll the cache while another worker refreshes `key`; None if it never lands."""
+    for _ in range(int(PRICE_LOCK_TIMEOUT / PRICE_POLL_INTERVAL)):
+        await asyncio.sleep(PRICE_POLL_INTERVAL)
+        cached = await cache_get(key)
+        if cached is not None:
+            return _decode_cached_price(cached)
+    return None
+
+
+def _decode_cached_price(cached: Dict) -> Dict:
+    """Restore the types of a price dict read back from the JSON cache."""
+    cached['market'] = MarketType(cached['market'])
+    cached['timestamp'] = datetime.fromisoformat(cached['timestamp'])
+    cached['cached'] = True
+    return cached
+
+
+def _price_ttl(market: MarketType) -> int:
+    """Cache TTL (seconds) for current prices in a market."""
+    if market == MarketType.CRYPTO:
+        return settings.CACHE_TTL_CRYPTO_PRICE
+    elif market == MarketType.FOREX:
+        return settings.CACHE_TTL_FOREX_PRICE
+    return settings.CACHE_TTL_STOCK_PRICE
+
+
+async def _get_stock_price(client: httpx.AsyncClient, symbol: str) -> Dict:
+    """Fetch stock price from Alpha Vantage."""
+    params = {
+        'function': 'GLOBAL_QUOTE',
+        'symbol': symbol,
+        'apikey': settings.ALPHA_VANTAGE_API_KEY
+    }
+
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    if 'Global Quote' not in data or not data['Global Quote']:
+        raise ValueError(f"No data found for symbol {symbol}")
+
+    quote = data['Global Quote']
+    price = float(quote.get('05. price', 0))
+
+    return {
+        'symbol': symbol,
+        'market': MarketType.STOCK,
+        'price': price,
+        'source': 'alpha_vantage',
+        'timestamp': datetime.now(UTC)
+    }
+
+
+async def _get_crypto_price(client: httpx.AsyncClient, symbol: str) -> Dict:
+    """Fetch crypto price from Alpha Vantage."""
+    params = {
+        'function': 'CURRENCY_EXCHANGE_RATE',
+        'from_currency': symbol,
+        'to_currency': 'USD',
+        'apikey': settings.ALPHA_VANTAGE_API_KEY
+    }
+
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    if 'Realtime Currency Exchange Rate' not in data:
+        raise ValueError(f"No data found for crypto {symbol}")
+
+    rate = data['Realtime Currency Exchange Rate']
+    price = float(rate.get('5. Exchange Rate', 0))
+
+    return {
+        'symbol': symbol,
+        'market': MarketType.CRYPTO,
+        'price': price,
+        'source': 'alpha_vantage',
+        'timestamp': datetime.now(UTC)
+    }
+
+
+async def _get_forex_price(client: httpx.AsyncClient, symbol: str) -> Dict:
+    """Fetch forex price from Alpha Vantage."""
+    # Symbol should be like EURUSD - split to from/to
+    from_currency = symbol[:3]
+    to_currency = symbol[3:6]
+
+    params = {
+        'function': 'CURRENCY_EXCHANGE_RATE',
+        'from_currency': from_currency,
+        'to_currency': to_currency,
+        'apikey': settings.ALPHA_VANTAGE_API_KEY
+    }
+
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    if 'Realtime Currency Exchange Rate' not in data:
+        raise ValueError(f"No data found for forex {symbol}")
+
+    rate = data['Realtime Currency Exchange Rate']
+    price = float(rate.get('5. Exchange Rate', 0))
+
+    return {
+        'symbol': symbol,
+        'market': MarketType.FOREX,
+        'price': price,
+        'source': 'alpha_vantage',
+        'timestamp': datetime.now(UTC)
+    }
+
+
+async def get_historical_data(
+    client: httpx.AsyncClient,
+    symbol: str,
+    resolution: str,
+    limit: int = 500,
+    market: Optional[MarketType] = None
+) -> List[Dict]:
+    """
+    Fetch historical OHLCV data.
+
+    Args:
+        client: Shared HTTP client (see `get_http_client`)
+        symbol: The ticker symbol
+        resolution: Time resolution (1, 5, 15, 30, 60, D, W, M)
+        limit: Number of candles to return
+        market: Market type (auto-detected if not provided)
+
+    Returns:
+        List of candle dictionaries
+    """
+    if market is None:
+        market = detect_market(symbol)
+
+    key = f"history:{market.value}:{symbol}:{resolution}:{limit}"
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+
+    if market == MarketType.STOCK:
+        result = await _get_stock_history(client, symbol, resolution, limit)
+    elif market == MarketType.CRYPTO:
+        result = await _get_crypto_history(client, symbol, resolution, limit)
+    else:
+        result = await _get_forex_history(client, symbol, resolution, limit)
+
+    # Intraday bars change quickly; daily and longer bars can be kept much longer
+    if resolution.isdigit():
+        ttl = settings.CACHE_TTL_INTRADAY_HISTORY
+    else:
+        ttl = settings.CACHE_TTL_DAILY_HISTORY
+
+    await cache_set(key, ttl, result)
+    return result
+
+
+def _output_size(limit: int) -> str:
+    """Request the small compact payload when it already covers `limit` candles."""
+    return 'compact' if limit <= COMPACT_SIZE else 'full'
+
+
+async def _get_stock_history(
+    client: httpx.AsyncClient,
+    symbol: str,
+    resolution: str,
+    limit: int
+) -> List[Dict]:
+    """Fetch stock historical data."""
+    if resolution not in STOCK_HISTORY_PARAMS:
+        raise ValueError(f"Unsupported resolution: {resolution}")
+
+    static_params, time_series_key, sized = STOCK_HISTORY_PARAMS[resolution]
+    params = {**static_params, 'symbol': symbol, 'apikey': settings.ALPHA_VANTAGE_API_KEY}
+    if sized:
+        params['outputsize'] = _output_size(limit)
+
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    if time_series_key not in data:
+        raise ValueError(f"No historical data found for {symbol}")
+
+    time_series = data[time_series_key]
+
+    # Convert to list of candles
+    candles = []
+    # ISO-8601 keys sort chronologically; take the newest `limit`, oldest first
+    for timestamp_str, values in reversed(heapq.nlargest(limit, time_series.items(), key=itemgetter(0))):
+        candles.append({
+            'timestamp': _parse_timestamp(timestamp_str),
+            'open': float(values[OPEN_KEY]),
+            'high': float(values[HIGH_KEY]),
+            'low': float(values[LOW_KEY]),
+            'close': float(values[CLOSE_KEY]),
+            'volume': float(values[VOLUME_KEY])
+        })
+
+    return candles
+
+
+async def _get_crypto_history(
+    client: httpx.AsyncClient,
+    symbol: str,
+    resolution: str,
+    limit: int
+) -> List[Dict]:
+    """Fetch crypto historical data."""
+    # Alpha Vantage has limited intraday crypto support
+    # For now, use daily data
+    params = {
+        'function': 'DIGITAL_CURRENCY_DAILY',
+        'symbol': symbol,
+        'market': 'USD',
+        'apikey': settings.ALPHA_VANTAGE_API_KEY
+    }
+
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    time_series_key = 'Time Series (Digital Currency Daily)'
+    if time_series_key not in data:
+        raise ValueError(f"No historical data found for {symbol}")
+
+    time_series = data[time_series_key]
+
+    candles = []
+    # ISO-8601 keys sort chronologically; take the newest `limit`, oldest first
+    for timestamp_str, values in reversed(heapq.nlargest(limit, time_series.items(), key=itemgetter(0))):
+        candles.append({
+            'timestamp': _parse_timestamp(timestamp_str),
+            'open': float(values[CRYPTO_OPEN_KEY]),
+            'high': float(values[CRYPTO_HIGH_KEY]),
+            'low': float(values[CRYPTO_LOW_KEY]),
+            'close': float(values[CRYPTO_CLOSE_KEY]),
+            'volume': float(values[VOLUME_KEY])
+        })
+
+    return candles
+
+
+async def _get_forex_history(
+    client: httpx.AsyncClient,
+    symbol: str,
+    resolution: str,
+    limit: int
+) -> List[Dict]:
+    """Fetch forex historical data."""
+    from_currency = symbol[:3]
+    to_currency = symbol[3:6]
+
+    static_params, time_series_key = FOREX_HISTORY_PARAMS.get(resolution, FOREX_DAILY_PARAMS)
+    params = {
+        **static_params,
+        'from_symbol': from_currency,
+        'to_symbol': to_currency,
+        'apikey': settings.ALPHA_VANTAGE_API_KEY,
+        'outputsize': _output_size(limit)
+    }
+
+    response = await client.get(BASE_URL, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    if time_series_key not in data:
+        raise ValueError(f"No historical data found for {symbol}")
+
+    time_series = data[time_series_key]
+
+    candles = []
+    # ISO-8601 keys sort chronologically; take the newest `limit`, oldest first
+    for timestamp_str, values in reversed(heapq.nlargest(limit, time_series.items(), key=itemgetter(0))):
+        candles.append({
+            'timestamp': _parse_timestamp(timestamp_str),
+            'open': float(values[OPEN_KEY]),
+            'high': float(values[HIGH_KEY]),
+            'low': float(values[LOW_KEY]),
+            'close': float(values[CLOSE_KEY]),
+            'volume': 0  # Forex doesn't have volume in Alpha Vantage
+        })
+
+    return candles
+
+
+def is_market_open(market: MarketType) -> bool:
+    """
+    Check if market is currently open for trading.
+
+    Note: This is a simplified implementation.
+    For production, consider holidays and exact trading hours.
+    """
+    # The answer only changes on minute boundaries, so memoize per minute
+    return _is_open_at(market, int(time.time() // 60))
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dependency for getting the shared HTTP client created at startup."""
+    return request.app.state.http
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -17,12 +17,18 @@ class TradeSide(str, enum.Enum):
     SELL = "sell"
 
 
+def string_enum(enum_cls: type) -> Enum:
+    """Enum stored as a short VARCHAR instead of a native database ENUM type."""
+    return Enum(enum_cls, native_enum=False, length=8, validate_strings=True)
+
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
     api_key = Column(String, unique=True, index=True, nullable=False)
     balance = Column(Float, default=100000.00, nullable=False)
+    trade_count = Column(Integer, default=0, server_default='0', nullable=False)  # Maintained by execute_trade
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -37,8 +43,8 @@ class Trade(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     symbol = Column(String, nullable=False, index=True)
-    market = Column(Enum(MarketType), nullable=False)
-    side = Column(Enum(TradeSide), nullable=False)
+    market = Column(string_enum(MarketType), nullable=False)
+    side = Column(string_enum(TradeSide), nullable=False)
     quantity = Column(Float, nullable=False)
     price = Column(Float, nullable=False)
     transaction_fee = Column(Float, default=0.0)
@@ -61,7 +67,7 @@ class Holding(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     symbol = Column(String, nullable=False)
-    market = Column(Enum(MarketType), nullable=False)
+    market = Column(string_enum(MarketType), nullable=False)
     quantity = Column(Float, nullable=False)
     average_price = Column(Float, nullable=False)  # For P&L calculation
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -69,26 +75,36 @@ class Holding(Base):
     # Relationships
     user = relationship("User", back_populates="holdings")
 
-    # Unique constraint: one holding per user per symbol
+    # Unique constraint: one holding per user per symbol (also the upsert conflict target)
     __table_args__ = (
-        Index('idx_user_symbol_unique', 'user_id', 'symbol', unique=True),
+        UniqueConstraint('user_id', 'symbol', name='uq_user_symbol'),
     )
 
 
+class Symbol(Base):
+    """Interned ticker symbols, referenced by id from the cache tables."""
+    __tablename__ = "symbols"
+
+    id = Column(Integer, primary_key=True)
+    text = Column(String, unique=True, nullable=False)
+
+
 class PriceCache(Base):
     """Cache for price data to reduce API calls."""
     __tablename__ = "price_cache"
 
     id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, nullable=False, index=True)
-    market = Column(Enum(MarketType), nullable=False)
+    symbol_id = Column(Integer, ForeignKey("symbols.id"), nullable=False)  # Covered by idx_symbol_timestamp
+    market = Column(string_enum(MarketType), nullable=False)
     price = Column(Float, nullable=False)
     source = Column(String, nullable=False)
-    timestamp = Column(DateTime(timezone=True), nullable=False)
+    timestamp = Column(BigInteger, nullable=False)  # Unix seconds
     cached_at = Column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (
-        Index('idx_symbol_timestamp', 'symbol', 'timestamp'),
+        Index('idx_symbol_timestamp', 'symbol_id', 'timestamp'),
+        # BRIN suits append-mostly time series: tiny index, fast range scans
+        Index('idx_price_cache_ts_brin', 'timestamp', postgresql_using='brin'),
     )
 
 
@@ -97,10 +113,10 @@ class HistoricalData(Base):
     __tablename__ = "historical_data"
 
     id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, nullable=False, index=True)
-    market = Column(Enum(MarketType), nullable=False)
+    symbol_id = Column(Integer, ForeignKey("symbols.id"), nullable=False)  # Covered by idx_symbol_resolution_timestamp
+    market = Column(string_enum(MarketType), nullable=False)
     resolution = Column(String, nullable=False)  # 1m, 5m, 1h, 1d, etc.
-    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+    timestamp = Column(BigInteger, nullable=False)  # Unix seconds
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
@@ -110,5 +126,12 @@ class HistoricalData(Base):
     cached_at = Column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (
-        Index('idx_symbol_resolution_timestamp', 'symbol', 'resolution', 'timestamp', unique=True),
+        # Serves /history range scans newest-first (Postgres walks it backwards) and,
+        # with the OHLCV columns included, answers them without touching the heap
+        Index(
+            'idx_symbol_resolution_timestamp', 'symbol_id', 'resolution', 'timestamp',
+            unique=True,
+            postgresql_include=['open', 'high', 'low', 'close', 'volume']
+        ),
+        Index('idx_hist_ts_brin', 'timestamp', postgresql_using='brin'),
     )
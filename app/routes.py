@@ -1,36 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from datetime import datetime
-import pytz
+import httpx
+from datetime import datetime, timedelta, timezone
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db, dialect_insert
 from app.auth import get_current_user
 from app.models import User, Trade, Holding, MarketType, TradeSide, PriceCache, HistoricalData
 from app.schemas import (
     PriceResponse,
+    PricesResponse,
     TradeRequest,
     TradeResponse,
     BalanceResponse,
     HoldingsResponse,
     HoldingItem,
     HistoryResponse,
-    Candle,
     MarketStatusResponse,
     UserCreate,
     UserCreateResponse
 )
-from app.market_data import MarketDataService
+from app import market_data
+from app.market_data import get_http_client
+from app.symbols import lookup_symbol_id, intern_symbol
+from app.cache import redis_client
 from app.config import settings
+import hashlib
 import secrets
 
 router = APIRouter()
 
+UTC = timezone.utc
+
+# How long a database-cached price is served before refetching
+PRICE_CACHE_TTL = timedelta(minutes=1)
+
+# Cache-Control max-age (seconds) for /price and /history responses
+PRICE_MAX_AGE = int(PRICE_CACHE_TTL.total_seconds())
+HISTORY_MAX_AGE = 300
+
+# Times to regenerate an API key that collides with an existing one
+API_KEY_ATTEMPTS = 3
+
 
 @router.post("/register", response_model=UserCreateResponse, tags=["Authentication"])
 async def register_user(
     user_data: UserCreate = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new trading account and receive an API key.
@@ -57,21 +75,23 @@ async def register_user(
     ```
     """
     try:
-        # Generate secure random API key
-        api_key = secrets.token_urlsafe(32)
-
-        # Ensure uniqueness
-        while db.query(User).filter(User.api_key == api_key).first():
-            api_key = secrets.token_urlsafe(32)
-
         # Set balance
         balance = user_data.balance if user_data and user_data.balance else settings.DEFAULT_BALANCE
 
-        # Create user
-        user = User(api_key=api_key, balance=balance)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        # Create user with a secure random API key. Uniqueness is enforced by the
+        # api_key unique index; a collision is astronomically unlikely, so it is
+        # handled by retrying rather than checking before every insert
+        for attempt in range(API_KEY_ATTEMPTS):
+            api_key = secrets.token_urlsafe(32)
+            user = User(api_key=api_key, balance=balance)
+            db.add(user)
+            try:
+                await db.commit()
+                break
+            except IntegrityError:
+                await db.rollback()
+                if attempt == API_KEY_ATTEMPTS - 1:
+                    raise
 
         return UserCreateResponse(
             user_id=user.id,
@@ -81,31 +101,89 @@ async def register_user(
         )
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
 
-# Resolution mapping for normalization
+# Resolution mapping for normalization, looked up inline on the /history hot path.
+# Upper-case hour/day/week aliases are spelled out so lookups need no .lower();
+# minute aliases can't be case-folded since '1M' means one month
 RESOLUTION_MAP = {
     '1m': '1', '5m': '5', '15m': '15', '30m': '30',
-    '1h': '60', '60m': '60',
-    '2h': '120', '120m': '120',
-    '4h': '240', '240m': '240',
-    '1d': 'D', 'd': 'D',
-    '1w': 'W', 'w': 'W',
-    '1M': 'M', '1mo': 'M', 'm': 'M'
+    '1h': '60', '60m': '60', '1H': '60',
+    '2h': '120', '120m': '120', '2H': '120',
+    '4h': '240', '240m': '240', '4H': '240',
+    '1d': 'D', 'd': 'D', '1D': 'D',
+    '1w': 'W', 'w': 'W', '1W': 'W',
+    '1M': 'M', '1mo': 'M', 'm': 'M', '1MO': 'M'
 }
 
+# Length of a bar (seconds) for the non-minute canonical resolutions
+BAR_SECONDS = {'D': 86400, 'W': 7 * 86400, 'M': 31 * 86400}
+
 
-def normalize_resolution(resolution: str) -> str:
-    """Normalize resolution aliases to canonical keys."""
-    return RESOLUTION_MAP.get(resolution, resolution)
+def _bar_seconds(resolution: str) -> int:
+    """Length of one bar at a canonical resolution, in seconds."""
+    if resolution.isdigit():
+        return int(resolution) * 60
+    return BAR_SECONDS.get(resolution, 86400)
+
+
+async def _cache_price(price_data: dict):
+    """Store a fetched price in the database cache (runs as a background task)."""
+    async with AsyncSessionLocal() as db:
+        db.add(PriceCache(
+            symbol_id=await intern_symbol(price_data['symbol']),
+            market=price_data['market'],
+            price=price_data['price'],
+            source=price_data['source'],
+            timestamp=int(price_data['timestamp'].timestamp())
+        ))
+        await db.commit()
+
+
+async def _cache_candles(symbol: str, market: MarketType, resolution: str, candles: list):
+    """
+    Store fetched candles in the database cache (runs as a background task).
+
+    The INSERT is executed with the candle rows as an executemany, which
+    SQLAlchemy sends as multi-row INSERT pages kept under the driver's bind
+    parameter limit (a single VALUES list for a 5000-candle history would
+    exceed asyncpg's 32767). Rows that already exist are skipped
+    (ON CONFLICT DO NOTHING, i.e. INSERT OR IGNORE on SQLite).
+    """
+    symbol_id = await intern_symbol(symbol)
+
+    async with AsyncSessionLocal() as db:
+        stmt = dialect_insert(db.bind, HistoricalData).on_conflict_do_nothing(
+            index_elements=['symbol_id', 'resolution', 'timestamp']
+        )
+        await db.execute(stmt, [
+            {
+                'symbol_id': symbol_id,
+                'market': market,
+                'resolution': resolution,
+                'timestamp': candle_data['timestamp'],
+                'open': candle_data['open'],
+                'high': candle_data['high'],
+                'low': candle_data['low'],
+                'close': candle_data['close'],
+                'volume': candle_data['volume'],
+                'source': 'alpha_vantage'
+            }
+            for candle_data in candles
+        ])
+        await db.commit()
 
 
 @router.get("/price", response_model=PriceResponse)
 async def get_price(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     symbol: str = Query(..., description="Ticker symbol (e.g., AAPL, BTC, EURUSD)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    http: httpx.AsyncClient = Depends(get_http_client),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -113,51 +191,97 @@ async def get_price(
     Supports stocks, crypto, and forex.
     """
     try:
-        # Check cache first (cache for 1 minute)
-        cache_entry = db.query(PriceCache).filter(
-            PriceCache.symbol == symbol.upper(),
-            PriceCache.cached_at >= datetime.now(pytz.UTC).replace(tzinfo=None) - pytz.timedelta(minutes=1)
-        ).first()
+        symbol = symbol.upper()
+
+        # With Redis configured, market_data serves cached prices straight from
+        # Redis; the database cache (1 minute) is only read as a fallback
+        cache_entry = None
+        symbol_id = await lookup_symbol_id(db, symbol) if redis_client is None else None
+        if symbol_id is not None:
+            cache_entry = await db.scalar(select(PriceCache).where(
+                PriceCache.symbol_id == symbol_id,
+                PriceCache.cached_at >= datetime.now(UTC).replace(tzinfo=None) - PRICE_CACHE_TTL
+            ).limit(1))
 
         if cache_entry:
-            return PriceResponse(
-                symbol=cache_entry.symbol,
+            price = PriceResponse(
+                symbol=symbol,
                 market=cache_entry.market,
                 price=cache_entry.price,
                 source=cache_entry.source,
-                updatedAt=int(cache_entry.timestamp.timestamp())
+                updatedAt=cache_entry.timestamp
+            )
+        else:
+            # Fetch from market data service
+            price_data = await market_data.get_price(http, symbol)
+
+            # Persist fresh upstream quotes once the response has been sent; a
+            # Redis hit (or a fetch shared with another request) is already stored
+            if not price_data.get('cached'):
+                background_tasks.add_task(_cache_price, price_data)
+
+            price = PriceResponse(
+                symbol=price_data['symbol'],
+                market=price_data['market'],
+                price=price_data['price'],
+                source=price_data['source'],
+                updatedAt=int(price_data['timestamp'].timestamp())
             )
 
-        # Fetch from market data service
-        price_data = await MarketDataService.get_price(symbol.upper())
+        # Let clients and proxies reuse the quote for as long as we cache it ourselves
+        etag = _etag(price.symbol, price.updatedAt, price.price)
+        headers = _cache_headers(etag, PRICE_MAX_AGE)
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=headers)
 
-        # Cache the result
-        cache = PriceCache(
-            symbol=price_data['symbol'],
-            market=price_data['market'],
-            price=price_data['price'],
-            source=price_data['source'],
-            timestamp=price_data['timestamp']
-        )
-        db.add(cache)
-        db.commit()
-
-        return PriceResponse(
-            symbol=price_data['symbol'],
-            market=price_data['market'],
-            price=price_data['price'],
-            source=price_data['source'],
-            updatedAt=int(price_data['timestamp'].timestamp())
-        )
+        response.headers.update(headers)
+        return price
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/prices", response_model=PricesResponse)
+async def get_prices(
+    symbols: str = Query(..., description="Comma-separated ticker symbols (e.g., AAPL,BTC,EURUSD)"),
+    http: httpx.AsyncClient = Depends(get_http_client),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fetch current prices for several symbols in one request.
+    Symbols are fetched concurrently; failed lookups are reported in `errors`.
+    """
+    # Normalize and dedupe while preserving the requested order
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(',') if s.strip()))
+
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+
+    results = await market_data.get_prices(http, symbol_list)
+
+    prices = []
+    errors = {}
+    for symbol, result in zip(symbol_list, results):
+        if isinstance(result, Exception):
+            errors[symbol] = str(result)
+            continue
+
+        prices.append(PriceResponse(
+            symbol=result['symbol'],
+            market=result['market'],
+            price=result['price'],
+            source=result['source'],
+            updatedAt=int(result['timestamp'].timestamp())
+        ))
+
+    return PricesResponse(prices=prices, errors=errors)
+
+
 @router.post("/trade", response_model=TradeResponse)
 async def execute_trade(
     trade_request: TradeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    http: httpx.AsyncClient = Depends(get_http_client),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -172,7 +296,7 @@ async def execute_trade(
 
     try:
         # Get current price
-        price_data = await MarketDataService.get_price(symbol)
+        price_data = await market_data.get_price(http, symbol)
         price = price_data['price']
         market = price_data['market']
 
@@ -193,6 +317,16 @@ async def execute_trade(
 
         total_cost = quantity * price + fee
 
+        # Lock the user's row (re-reading the balance) so concurrent trades by the
+        # same user serialize here instead of overwriting each other's balance.
+        # Taken after the price fetch so the lock is never held across network I/O
+        await db.scalar(
+            select(User)
+            .where(User.id == current_user.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+
         # Check if user has sufficient funds/holdings
         if side == TradeSide.BUY:
             if current_user.balance < total_cost:
@@ -204,34 +338,32 @@ async def execute_trade(
             # Deduct from balance
             current_user.balance -= total_cost
 
-            # Update or create holding
-            holding = db.query(Holding).filter(
-                Holding.user_id == current_user.id,
-                Holding.symbol == symbol
-            ).first()
-
-            if holding:
-                # Update average price
-                total_quantity = holding.quantity + quantity
-                holding.average_price = (
-                    (holding.quantity * holding.average_price) + (quantity * price)
-                ) / total_quantity
-                holding.quantity = total_quantity
-            else:
-                holding = Holding(
-                    user_id=current_user.id,
-                    symbol=symbol,
-                    market=market,
-                    quantity=quantity,
-                    average_price=price
-                )
-                db.add(holding)
+            # Create the holding or add to it (re-weighting the average price) in one statement
+            stmt = dialect_insert(db.bind, Holding).values(
+                user_id=current_user.id,
+                symbol=symbol,
+                market=market,
+                quantity=quantity,
+                average_price=price
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'symbol'],
+                set_={
+                    'quantity': Holding.quantity + stmt.excluded.quantity,
+                    'average_price': (
+                        Holding.quantity * Holding.average_price
+                        + stmt.excluded.quantity * stmt.excluded.average_price
+                    ) / (Holding.quantity + stmt.excluded.quantity),
+                    'updated_at': func.now()
+                }
+            )
+            await db.execute(stmt)
 
         else:  # SELL
-            holding = db.query(Holding).filter(
+            holding = await db.scalar(select(Holding).where(
                 Holding.user_id == current_user.id,
                 Holding.symbol == symbol
-            ).first()
+            ).with_for_update())
 
             if not holding or holding.quantity < quantity:
                 available = holding.quantity if holding else 0
@@ -246,9 +378,10 @@ async def execute_trade(
             # Update holding
             holding.quantity -= quantity
             if holding.quantity == 0:
-                db.delete(holding)
+                await db.delete(holding)
 
         # Record trade
+        current_user.trade_count += 1
         trade = Trade(
             user_id=current_user.id,
             symbol=symbol,
@@ -260,8 +393,8 @@ async def execute_trade(
             total_cost=total_cost
         )
         db.add(trade)
-        db.commit()
-        db.refresh(trade)
+        await db.commit()
+        await db.refresh(trade)
 
         return TradeResponse(
             status="success",
@@ -284,14 +417,14 @@ async def execute_trade(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/balance", response_model=BalanceResponse)
 async def get_balance(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get the current cash balance for the authenticated user.
@@ -302,20 +435,27 @@ async def get_balance(
 @router.get("/holdings", response_model=HoldingsResponse)
 async def get_holdings(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    http: httpx.AsyncClient = Depends(get_http_client)
 ):
     """
     Get all holdings with current prices and P&L calculations.
     """
-    holdings = db.query(Holding).filter(Holding.user_id == current_user.id).all()
+    holdings = (await db.scalars(select(Holding).where(Holding.user_id == current_user.id))).all()
+
+    # Fetch every distinct symbol's price concurrently
+    symbols = list(dict.fromkeys(holding.symbol for holding in holdings))
+    results = await market_data.get_prices(http, symbols)
+    prices = dict(zip(symbols, results))
 
     holding_items = []
     total_value = 0
 
     for holding in holdings:
+        price_data = prices[holding.symbol]
         try:
-            # Get current price
-            price_data = await MarketDataService.get_price(holding.symbol)
+            if isinstance(price_data, Exception):
+                raise price_data
             current_price = price_data['price']
 
             # Calculate unrealized P&L
@@ -344,9 +484,8 @@ async def get_holdings(
             ))
 
     # Calculate realized P&L from trades
-    trades = db.query(Trade).filter(Trade.user_id == current_user.id).all()
     realized_pnl = None
-    if trades:
+    if current_user.trade_count:
         # Simple calculation: current balance - initial balance
         realized_pnl = current_user.balance - settings.DEFAULT_BALANCE
 
@@ -361,15 +500,82 @@ async def get_holdings(
     )
 
 
+def _history_response(
+    request: Request,
+    response: Response,
+    symbol: str,
+    market: MarketType,
+    resolution: str,
+    candles: list,
+    source: str
+):
+    """
+    Build a history payload for the HistoryResponse model to serialize.
+
+    Sets the caching headers on `response`, or returns a bodiless 304 when
+    the client's copy (If-None-Match) is still current.
+    """
+    # The newest bar may still be forming, so its close and volume are part of the tag
+    first, last = (candles[0], candles[-1]) if candles else ({}, {})
+    etag = _etag(
+        symbol, resolution, len(candles),
+        first.get('timestamp'), last.get('timestamp'), last.get('close'), last.get('volume')
+    )
+    headers = _cache_headers(etag, HISTORY_MAX_AGE)
+    if etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return {
+        'symbol': symbol,
+        'market': market,
+        'resolution': resolution,
+        'count': len(candles),
+        'history': candles,
+        'source': source,
+        'updatedAt': int(datetime.now(UTC).timestamp())
+    }
+
+
+def _etag(*parts) -> str:
+    """Strong ETag derived from the values that determine a response body."""
+    return '"' + hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest() + '"'
+
+
+def _cache_headers(etag: str, max_age: int) -> dict:
+    """
+    HTTP caching headers for market data responses.
+
+    Vary: Authorization keeps shared caches from serving one API key's
+    response to another client.
+    """
+    return {'Cache-Control': f'public, max-age={max_age}', 'ETag': etag, 'Vary': 'Authorization'}
+
+
+# Columns of a cached candle, in Candle field order
+CANDLE_COLUMNS = (
+    HistoricalData.timestamp,
+    HistoricalData.open,
+    HistoricalData.high,
+    HistoricalData.low,
+    HistoricalData.close,
+    HistoricalData.volume
+)
+
+
 @router.get("/history", response_model=HistoryResponse)
 async def get_history(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     symbol: str = Query(..., description="Ticker symbol"),
     resolution: str = Query(..., description="Resolution (1m, 5m, 15m, 30m, 1h, 2h, 4h, 1d, 1w, 1M)"),
     limit: int = Query(500, ge=1, le=5000, description="Number of candles to return"),
     start_ts: Optional[int] = Query(None, description="Start timestamp (Unix seconds, inclusive)"),
     end_ts: Optional[int] = Query(None, description="End timestamp (Unix seconds, exclusive)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    http: httpx.AsyncClient = Depends(get_http_client)
 ):
     """
     Fetch historical OHLCV data for a symbol.
@@ -377,99 +583,69 @@ async def get_history(
     """
     try:
         # Normalize resolution
-        canonical_resolution = normalize_resolution(resolution)
+        canonical_resolution = RESOLUTION_MAP.get(resolution, resolution)
         symbol = symbol.upper()
 
         # Detect market
-        market = MarketDataService.detect_market(symbol)
+        market = market_data.detect_market(symbol)
 
         # Check cache first
-        query = db.query(HistoricalData).filter(
-            HistoricalData.symbol == symbol,
-            HistoricalData.resolution == canonical_resolution
-        )
+        symbol_id = await lookup_symbol_id(db, symbol)
+        cached_data = []
+        if symbol_id is not None:
+            # Only the OHLCV columns (all covered by idx_symbol_resolution_timestamp),
+            # read as plain row mappings rather than ORM objects
+            query = select(*CANDLE_COLUMNS).where(
+                HistoricalData.symbol_id == symbol_id,
+                HistoricalData.resolution == canonical_resolution
+            )
 
-        if start_ts:
-            start_dt = datetime.fromtimestamp(start_ts, tz=pytz.UTC)
-            query = query.filter(HistoricalData.timestamp >= start_dt)
+            if start_ts:
+                query = query.where(HistoricalData.timestamp >= start_ts)
 
-        if end_ts:
-            end_dt = datetime.fromtimestamp(end_ts, tz=pytz.UTC)
-            query = query.filter(HistoricalData.timestamp < end_dt)
-
-        cached_data = query.order_by(HistoricalData.timestamp.desc()).limit(limit).all()
-
-        # If we have enough cached data, return it
-        if len(cached_data) >= limit:
-            candles = [
-                Candle(
-                    timestamp=int(candle.timestamp.timestamp()),
-                    open=candle.open,
-                    high=candle.high,
-                    low=candle.low,
-                    close=candle.close,
-                    volume=candle.volume
-                )
-                for candle in reversed(cached_data)
+            if end_ts:
+                query = query.where(HistoricalData.timestamp < end_ts)
+
+            cached_data = [
+                dict(row) for row in
+                (await db.execute(query.order_by(HistoricalData.timestamp.desc()).limit(limit))).mappings()
             ]
 
-            return HistoryResponse(
-                symbol=symbol,
-                market=market,
-                resolution=resolution,
-                count=len(candles),
-                history=candles,
-                source="cache",
-                updatedAt=int(datetime.now(pytz.UTC).timestamp())
-            )
+        # Serve from the cache only if it holds enough candles and reaches up to
+        # the end of the requested window (now, unless end_ts is in the past);
+        # otherwise the missing tail is fetched and merged below
+        horizon = int(datetime.now(UTC).timestamp())
+        if end_ts:
+            horizon = min(horizon, end_ts)
+        if len(cached_data) >= limit and cached_data[0]['timestamp'] >= horizon - _bar_seconds(canonical_resolution):
+            # Rows were read newest-first; candles are returned oldest-first
+            cached_data.reverse()
+            return _history_response(request, response, symbol, market, resolution, cached_data, "cache")
+
+        # Stored candles are merged into the result so bars older than
+        # Alpha Vantage's window are kept, and are never re-inserted
+        merged = {candle['timestamp']: candle for candle in cached_data}
 
         # Fetch from market data service
-        history_data = await MarketDataService.get_historical_data(
+        history_data = await market_data.get_historical_data(
+            http,
             symbol=symbol,
             resolution=canonical_resolution,
             limit=limit,
             market=market
         )
 
-        # Cache the results
-        for candle_data in history_data:
-            candle_dt = datetime.fromtimestamp(candle_data['timestamp'], tz=pytz.UTC)
-
-            # Check if already exists
-            existing = db.query(HistoricalData).filter(
-                HistoricalData.symbol == symbol,
-                HistoricalData.resolution == canonical_resolution,
-                HistoricalData.timestamp == candle_dt
-            ).first()
-
-            if not existing:
-                historical_data = HistoricalData(
-                    symbol=symbol,
-                    market=market,
-                    resolution=canonical_resolution,
-                    timestamp=candle_dt,
-                    open=candle_data['open'],
-                    high=candle_data['high'],
-                    low=candle_data['low'],
-                    close=candle_data['close'],
-                    volume=candle_data['volume'],
-                    source='alpha_vantage'
-                )
-                db.add(historical_data)
+        # Cache new candles once the response has been sent
+        new_candles = [candle_data for candle_data in history_data if candle_data['timestamp'] not in merged]
 
-        db.commit()
+        if new_candles:
+            background_tasks.add_task(_cache_candles, symbol, market, canonical_resolution, new_candles)
 
-        candles = [Candle(**candle_data) for candle_data in history_data]
+        merged.update((candle_data['timestamp'], candle_data) for candle_data in history_data)
 
-        return HistoryResponse(
-            symbol=symbol,
-            market=market,
-            resolution=resolution,
-            count=len(candles),
-            history=candles,
-            source="alpha_vantage",
-            updatedAt=int(datetime.now(pytz.UTC).timestamp())
-        )
+        candles = [merged[ts] for ts in sorted(merged)[-limit:]]
+
+        return _history_response(request, response, symbol, market, resolution, candles, "alpha_vantage")
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -487,7 +663,7 @@ async def get_market_status(
     """
     try:
         if symbol:
-            market_type = MarketDataService.detect_market(symbol.upper())
+            market_type = market_data.detect_market(symbol.upper())
         elif market:
             market_type = MarketType(market.lower())
         else:
@@ -496,7 +672,7 @@ async def get_market_status(
                 detail="Either 'symbol' or 'market' parameter is required"
             )
 
-        is_open = MarketDataService.is_market_open(market_type)
+        is_open = market_data.is_market_open(market_type)
 
         return MarketStatusResponse(isOpen=is_open)
 
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -32,14 +32,18 @@ class Resolution(str, Enum):
 # Request/Response Schemas
 
 class PriceResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     symbol: str
     market: MarketType
     price: float
     source: str
     updatedAt: int  # Unix timestamp
 
-    class Config:
-        from_attributes = True
+
+class PricesResponse(BaseModel):
+    prices: List[PriceResponse]
+    errors: Dict[str, str] = {}  # symbol -> error message for failed lookups
 
 
 class TradeRequest(BaseModel):
@@ -47,8 +51,9 @@ class TradeRequest(BaseModel):
     side: TradeSide
     quantity: float = Field(gt=0)
 
-    @validator('quantity')
-    def validate_quantity(cls, v, values):
+    @field_validator('quantity')
+    @classmethod
+    def validate_quantity(cls, v):
         return v
 
 
@@ -81,6 +86,8 @@ class HoldingsResponse(BaseModel):
 
 
 class Candle(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     timestamp: int  # Unix timestamp
     open: float
     high: float
@@ -0,0 +1,48 @@
+from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_engine, dialect_insert
+from app.models import Symbol
+
+# Process-wide symbol -> id map; ids never change once assigned, so hot paths
+# only touch the symbols table the first time a symbol is seen
+_symbol_ids: Dict[str, int] = {}
+
+
+async def lookup_symbol_id(db: AsyncSession, symbol: str) -> Optional[int]:
+    """Return the interned id for a symbol, or None if it was never stored."""
+    symbol_id = _symbol_ids.get(symbol)
+
+    if symbol_id is None:
+        symbol_id = await db.scalar(select(Symbol.id).where(Symbol.text == symbol))
+        if symbol_id is not None:
+            _symbol_ids[symbol] = symbol_id
+
+    return symbol_id
+
+
+async def intern_symbol(symbol: str) -> int:
+    """
+    Return the id for a symbol, inserting it into the symbols table if needed.
+
+    Runs in its own transaction so the id is committed before it is cached,
+    regardless of what happens to the caller's session.
+    """
+    symbol_id = _symbol_ids.get(symbol)
+
+    if symbol_id is None:
+        async with async_engine.begin() as conn:
+            symbol_id = await conn.scalar(
+                dialect_insert(conn, Symbol)
+                .values(text=symbol)
+                .on_conflict_do_nothing(index_elements=['text'])
+                .returning(Symbol.id)
+            )
+
+            # Already interned by another worker
+            if symbol_id is None:
+                symbol_id = (await conn.execute(select(Symbol.id).where(Symbol.text == symbol))).scalar_one()
+
+        _symbol_ids[symbol] = symbol_id
+
+    return symbol_id
@@ -1,7 +1,8 @@
 """
 Basic trading example demonstrating API usage.
 """
-import requests
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 # Configuration
@@ -10,10 +11,13 @@ API_KEY = "YOUR_API_KEY_HERE"  # Replace with your actual API key
 
 headers = {"Authorization": f"Bearer {API_KEY}"}
 
+# One client for the whole script so every call reuses the same keep-alive connection
+client = httpx.Client(base_url=BASE_URL, headers=headers)
+
 
 def get_price(symbol: str):
     """Fetch current price for a symbol."""
-    response = requests.get(f"{BASE_URL}/price", params={"symbol": symbol}, headers=headers)
+    response = client.get("/price", params={"symbol": symbol})
     response.raise_for_status()
     return response.json()
 
@@ -21,21 +25,21 @@ def get_price(symbol: str):
 def execute_trade(symbol: str, side: str, quantity: float):
     """Execute a buy or sell trade."""
     trade_data = {"symbol": symbol, "side": side, "quantity": quantity}
-    response = requests.post(f"{BASE_URL}/trade", json=trade_data, headers=headers)
+    response = client.post("/trade", json=trade_data)
     response.raise_for_status()
     return response.json()
 
 
 def get_balance():
     """Get current cash balance."""
-    response = requests.get(f"{BASE_URL}/balance", headers=headers)
+    response = client.get("/balance")
     response.raise_for_status()
     return response.json()
 
 
 def get_holdings():
     """Get all holdings with P&L."""
-    response = requests.get(f"{BASE_URL}/holdings", headers=headers)
+    response = client.get("/holdings")
     response.raise_for_status()
     return response.json()
 
@@ -43,7 +47,7 @@ def get_holdings():
 def get_history(symbol: str, resolution: str = "1d", limit: int = 30):
     """Get historical OHLCV data."""
     params = {"symbol": symbol, "resolution": resolution, "limit": limit}
-    response = requests.get(f"{BASE_URL}/history", params=params, headers=headers)
+    response = client.get("/history", params=params)
     response.raise_for_status()
     return response.json()
 
@@ -52,15 +56,22 @@ def main():
     """Demonstrate basic trading operations."""
     print("🚀 Stock Trading API - Basic Example\n")
 
+    # The read-only calls don't depend on each other or on the trades below,
+    # so fire them together up front
+    symbol = "AAPL"
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        balance_future = pool.submit(get_balance)
+        price_future = pool.submit(get_price, symbol)
+        history_future = pool.submit(get_history, symbol, resolution="1d", limit=5)
+
     # 1. Check initial balance
     print("1. Checking initial balance...")
-    balance = get_balance()
+    balance = balance_future.result()
     print(f"   Cash Balance: ${balance['balance']:,.2f}\n")
 
     # 2. Get current price
-    symbol = "AAPL"
     print(f"2. Fetching current price for {symbol}...")
-    price_data = get_price(symbol)
+    price_data = price_future.result()
     print(f"   {price_data['symbol']}: ${price_data['price']:.2f}")
     print(f"   Market: {price_data['market']}")
     print(f"   Source: {price_data['source']}\n")
@@ -91,7 +102,7 @@ def main():
 
     # 5. Get historical data
     print(f"5. Fetching historical data for {symbol}...")
-    history = get_history(symbol, resolution="1d", limit=5)
+    history = history_future.result()
     print(f"   Last 5 days of {history['symbol']}:")
     for candle in history['history'][-5:]:
         print(f"   - Close: ${candle['close']:.2f} | Volume: {candle['volume']:,.0f}")
@@ -120,7 +131,9 @@ def main():
 if __name__ == "__main__":
     try:
         main()
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         print(f"\n❌ API Error: {e.response.text}")
     except Exception as e:
         print(f"\n❌ Error: {e}")
+    finally:
+        client.close()
@@ -29,8 +29,15 @@ def get_historical_data(symbol: str, resolution: str = "1d", limit: int = 200):
 
 
 def calculate_sma(df: pd.DataFrame, window: int) -> pd.Series:
-    """Calculate Simple Moving Average."""
-    return df['close'].rolling(window=window).mean()
+    """Calculate Simple Moving Average (NaN until a full window is available)."""
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    # Each window sum is the difference of two prefix sums
+    cumsum = np.concatenate(([0.0], np.cumsum(close)))
+    sma = np.full(close.shape, np.nan)
+    sma[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+
+    return pd.Series(sma, index=df.index)
 
 
 def moving_average_crossover_strategy(df: pd.DataFrame, short_window: int = 20, long_window: int = 50):
@@ -71,44 +78,51 @@ def backtest_strategy(symbol: str, initial_balance: float = 100000):
     # Apply strategy
     df = moving_average_crossover_strategy(df)
 
-    # Simulate trading
+    # Simulate trading. Only crossover bars can trade, so locate them with
+    # NumPy and walk just those instead of every bar
+    close = df['close'].to_numpy()
+    position = df['position'].to_numpy()
+    crossovers = np.flatnonzero((position == 2) | (position == -2))
+
     cash = initial_balance
     shares = 0
     trades = []
 
-    for idx, row in df.iterrows():
+    for i in crossovers:
+        price = close[i]
+
         # Buy signal (crossover up)
-        if row['position'] == 2 and cash > 0:
+        if position[i] == 2 and cash > 0:
             # Buy as many shares as possible
-            shares_to_buy = int(cash / row['close'])
+            shares_to_buy = int(cash / price)
             if shares_to_buy > 0:
-                cost = shares_to_buy * row['close']
+                cost = shares_to_buy * price
                 cash -= cost
                 shares += shares_to_buy
                 trades.append({
-                    'date': idx,
+                    'date': df.index[i],
                     'action': 'BUY',
                     'shares': shares_to_buy,
-                    'price': row['close'],
+                    'price': price,
                     'total': cost
                 })
 
         # Sell signal (crossover down)
-        elif row['position'] == -2 and shares > 0:
+        elif position[i] == -2 and shares > 0:
             # Sell all shares
-            revenue = shares * row['close']
+            revenue = shares * price
             cash += revenue
             trades.append({
-                'date': idx,
+                'date': df.index[i],
                 'action': 'SELL',
                 'shares': shares,
-                'price': row['close'],
+                'price': price,
                 'total': revenue
             })
             shares = 0
 
     # Final portfolio value
-    final_value = cash + (shares * df.iloc[-1]['close'])
+    final_value = cash + (shares * close[-1])
     total_return = final_value - initial_balance
     return_pct = (total_return / initial_balance) * 100
 
@@ -131,7 +145,7 @@ def backtest_strategy(symbol: str, initial_balance: float = 100000):
     print(f"Initial Balance:    ${initial_balance:,.2f}")
     print(f"Final Balance:      ${cash:,.2f}")
     print(f"Shares Held:        {shares}")
-    print(f"Shares Value:       ${shares * df.iloc[-1]['close']:,.2f}")
+    print(f"Shares Value:       ${shares * close[-1]:,.2f}")
     print(f"Total Portfolio:    ${final_value:,.2f}")
     print(f"Total Return:       ${total_return:+,.2f} ({return_pct:+.2f}%)")
     print("=" * 60)
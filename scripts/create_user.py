@@ -1,18 +1,81 @@
 """
 Script to create a new user with an API key.
-Usage: python -m scripts.create_user
+Usage: python -m scripts.create_user [--balance AMOUNT] [--count N] [--ephemeral]
 """
+import base64
+import os
 import secrets
 import sys
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
-from app.models import User
-from app.config import settings
+
+# The app/SQLAlchemy imports live inside the functions that use them, so
+# importing this module (e.g. just for generate_api_key) doesn't build an
+# engine or load settings
+
+# Random bytes per API key (43 URL-safe characters)
+API_KEY_BYTES = 32
+
+# Times to regenerate an API key that collides with an existing one
+API_KEY_ATTEMPTS = 3
+
+# Set once create_all has run in this process
+_SCHEMA_READY = False
 
 
 def generate_api_key() -> str:
     """Generate a secure random API key."""
-    return secrets.token_urlsafe(32)
+    return secrets.token_urlsafe(API_KEY_BYTES)
+
+
+def generate_api_keys(count: int) -> list[str]:
+    """
+    Generate `count` API keys in the same format as generate_api_key.
+
+    Reads the randomness for every key with one os.urandom call and slices it,
+    rather than making a syscall per key.
+    """
+    buf = os.urandom(API_KEY_BYTES * count)
+    return [
+        base64.urlsafe_b64encode(buf[i:i + API_KEY_BYTES]).rstrip(b'=').decode('ascii')
+        for i in range(0, len(buf), API_KEY_BYTES)
+    ]
+
+
+def ensure_schema():
+    """Create missing tables, at most once per process (see scripts.init_db)."""
+    global _SCHEMA_READY
+    if not _SCHEMA_READY:
+        from app.database import engine, Base
+        import app.models  # noqa: F401 (registers the tables on Base.metadata)
+
+        Base.metadata.create_all(bind=engine)
+        _SCHEMA_READY = True
+
+
+def enable_ephemeral_mode() -> bool:
+    """
+    Stop fsyncing on commit for this process's SQLite connections.
+
+    Meant for seeding throwaway databases: a crash or power loss mid-run can
+    corrupt the file. Returns False (and changes nothing) on other backends.
+    """
+    from sqlalchemy import event
+    from app.database import engine
+
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    @event.listens_for(engine, "connect")
+    def _set_ephemeral_pragmas(dbapi_connection, connection_record):
+        # journal_mode is left alone: it is stored in the database file, and
+        # switching out of WAL here would outlive this process
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    # Connections opened before the listener was added wouldn't get the pragmas
+    engine.dispose()
+    return True
 
 
 def create_user(balance: float = None) -> tuple[str, float]:
@@ -25,27 +88,39 @@ def create_user(balance: float = None) -> tuple[str, float]:
     Returns:
         Tuple of (api_key, balance)
     """
+    from sqlalchemy.orm import Session
+    from app.database import SessionLocal, dialect_insert
+    from app.models import User
+    from app.config import settings
+
     if balance is None:
         balance = settings.DEFAULT_BALANCE
 
     # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    ensure_schema()
 
     db: Session = SessionLocal()
     try:
-        api_key = generate_api_key()
-
-        # Ensure unique API key
-        while db.query(User).filter(User.api_key == api_key).first():
+        # A duplicate key (astronomically unlikely, even with concurrent runs) is
+        # skipped by the database rather than raising, and RETURNING yields no id;
+        # the new id otherwise comes back without a follow-up SELECT
+        for _ in range(API_KEY_ATTEMPTS):
             api_key = generate_api_key()
+            user_id = db.execute(
+                dialect_insert(db.bind, User)
+                .values(api_key=api_key, balance=balance)
+                .on_conflict_do_nothing(index_elements=['api_key'])
+                .returning(User.id)
+            ).scalar_one_or_none()
+            if user_id is not None:
+                break
+        else:
+            raise RuntimeError(f"Could not generate a unique API key in {API_KEY_ATTEMPTS} attempts")
 
-        user = User(api_key=api_key, balance=balance)
-        db.add(user)
         db.commit()
-        db.refresh(user)
 
         print(f"\n✅ User created successfully!")
-        print(f"User ID: {user.id}")
+        print(f"User ID: {user_id}")
         print(f"API Key: {api_key}")
         print(f"Initial Balance: ${balance:,.2f}")
         print(f"\nStore this API key securely - it won't be shown again!")
@@ -62,8 +137,64 @@ def create_user(balance: float = None) -> tuple[str, float]:
         db.close()
 
 
+def create_users(count: int, balance: float = None, batch_size: int = 10000) -> list[str]:
+    """
+    Create many users at once for seeding or load testing.
+
+    Keys are generated (and de-duplicated) up front, then inserted with one
+    multi-row INSERT and commit per batch instead of a round trip per user.
+
+    Args:
+        count: Number of users to create
+        balance: Initial balance for every user (defaults to DEFAULT_BALANCE from settings)
+        batch_size: Users per INSERT/commit
+
+    Returns:
+        The new API keys
+    """
+    from sqlalchemy import insert
+    from app.database import engine
+    from app.models import User
+    from app.config import settings
+
+    if balance is None:
+        balance = settings.DEFAULT_BALANCE
+
+    api_keys = set(generate_api_keys(count))
+    while len(api_keys) < count:
+        api_keys.update(generate_api_keys(count - len(api_keys)))
+    api_keys = list(api_keys)
+
+    # Create tables if they don't exist
+    ensure_schema()
+
+    # A Core insert skips the ORM's per-row bookkeeping and is compiled once (then
+    # cached) for every batch; on PostgreSQL each batch goes out as multi-row
+    # INSERTs of up to batch_size rows, on SQLite as a single executemany
+    stmt = insert(User.__table__)
+    try:
+        for start in range(0, count, batch_size):
+            with engine.begin() as conn:
+                conn.execution_options(insertmanyvalues_page_size=batch_size)
+                conn.execute(
+                    stmt,
+                    [{"api_key": api_key, "balance": balance} for api_key in api_keys[start:start + batch_size]]
+                )
+
+    except Exception as e:
+        print(f"❌ Error creating users: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ Created {count:,} users with an initial balance of ${balance:,.2f}")
+    print(f"\nAPI Keys:")
+    print("\n".join(api_keys))
+
+    return api_keys
+
+
 if __name__ == "__main__":
     import argparse
+    from app.config import settings
 
     parser = argparse.ArgumentParser(description="Create a new trading API user")
     parser.add_argument(
@@ -72,6 +203,25 @@ if __name__ == "__main__":
         default=None,
         help=f"Initial balance (default: ${settings.DEFAULT_BALANCE:,.2f})"
     )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        help="Number of users to create (default: 1)"
+    )
+    parser.add_argument(
+        "--ephemeral",
+        action="store_true",
+        help="SQLite only: skip fsync on commit for faster seeding (unsafe for data you want to keep)"
+    )
 
     args = parser.parse_args()
-    create_user(balance=args.balance)
+    if args.ephemeral:
+        if enable_ephemeral_mode():
+            print("⚠️  Ephemeral mode: commits are not synced to disk; don't use this on real data")
+        else:
+            print("⚠️  --ephemeral only applies to SQLite databases; ignoring it")
+    if args.count > 1:
+        create_users(args.count, balance=args.balance)
+    else:
+        create_user(balance=args.balance)
@@ -3,20 +3,28 @@ Initialize the database with tables.
 Usage: python -m scripts.init_db
 """
 from app.database import engine, Base
-from app.models import User, Trade, Holding, PriceCache, HistoricalData
+from app.models import User, Trade, Holding, Symbol, PriceCache, HistoricalData
 
 
 def init_database():
     """Create all database tables."""
     print("Creating database tables...")
 
-    Base.metadata.create_all(bind=engine)
+    # One connection and transaction for every existence check and CREATE
+    with engine.begin() as conn:
+        if conn.dialect.name == 'sqlite':
+            # WAL persists in the database file, so the API and scripts inherit it
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+
+        Base.metadata.create_all(bind=conn, checkfirst=True)
 
     print("✅ Database tables created successfully!")
     print("\nCreated tables:")
     print("  - users")
     print("  - trades")
     print("  - holdings")
+    print("  - symbols")
     print("  - price_cache")
     print("  - historical_data")
 
@@ -3,45 +3,43 @@ Reset a user's balance and clear their trades/holdings.
 Usage: python -m scripts.reset_user <api_key>
 """
 import sys
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy import delete, update
+from app.database import engine
 from app.models import User, Trade, Holding
 from app.config import settings
 
 
 def reset_user(api_key: str):
     """Reset user's account to initial state."""
-    db: Session = SessionLocal()
     try:
-        user = db.query(User).filter(User.api_key == api_key).first()
-
-        if not user:
-            print(f"❌ User not found with API key: {api_key}")
-            sys.exit(1)
-
-        # Delete all trades
-        trades_deleted = db.query(Trade).filter(Trade.user_id == user.id).delete()
-
-        # Delete all holdings
-        holdings_deleted = db.query(Holding).filter(Holding.user_id == user.id).delete()
-
-        # Reset balance
-        user.balance = settings.DEFAULT_BALANCE
-
-        db.commit()
+        # Everything below runs as one transaction, committed on exit. No ORM
+        # objects are loaded, so a plain connection is used instead of a Session
+        with engine.begin() as conn:
+            # Reset the balance and find the user's id in the same round trip; only
+            # the id comes back, and api_key's unique index makes it at most one row
+            user_id = conn.execute(
+                update(User)
+                .where(User.api_key == api_key)
+                .values(balance=settings.DEFAULT_BALANCE, trade_count=0)
+                .returning(User.id)
+            ).scalar_one_or_none()
+
+            if user_id is None:
+                print(f"❌ User not found with API key: {api_key}")
+                sys.exit(1)
+
+            trades_deleted = conn.execute(delete(Trade).where(Trade.user_id == user_id)).rowcount
+            holdings_deleted = conn.execute(delete(Holding).where(Holding.user_id == user_id)).rowcount
 
         print(f"\n✅ User account reset successfully!")
-        print(f"User ID: {user.id}")
+        print(f"User ID: {user_id}")
         print(f"Trades deleted: {trades_deleted}")
         print(f"Holdings deleted: {holdings_deleted}")
-        print(f"Balance reset to: ${user.balance:,.2f}")
+        print(f"Balance reset to: ${settings.DEFAULT_BALANCE:,.2f}")
 
     except Exception as e:
-        db.rollback()
         print(f"❌ Error resetting user: {e}")
         sys.exit(1)
-    finally:
-        db.close()
 
 
 if __name__ == "__main__":
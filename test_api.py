@@ -2,157 +2,184 @@
 Simple test script to verify API is working correctly.
 Run this after setting up the API to ensure everything works.
 
-Usage: python test_api.py YOUR_API_KEY
+Usage: python test_api.py YOUR_API_KEY [BASE_URL]
+
+Responses are validated against the API's own models in app.schemas, so
+keep this script next to the app package and install the project
+requirements before running it.
 """
+import asyncio
 import sys
-import requests
-from typing import Optional
+import httpx
+from typing import Any, Awaitable, Callable, List, Tuple
+from app.schemas import (
+    BalanceResponse,
+    HistoryResponse,
+    HoldingsResponse,
+    MarketStatusResponse,
+    PriceResponse,
+    TradeResponse,
+)
+
+
+# Read-only probes run concurrently, each on its own pooled keep-alive connection.
+# Behind an HTTPS endpoint that negotiates HTTP/2 they share one multiplexed
+# connection instead; plain http:// (e.g. uvicorn in development) stays on HTTP/1.1
+CONCURRENT_CHECKS = 5
+
+
+async def check_health(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    response = await client.get(f"{base_url.replace('/api', '')}/health")
+    response.raise_for_status()
+    return []
+
+
+async def check_price(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    response = await client.get(f"{base_url}/price", params={"symbol": "AAPL"})
+    response.raise_for_status()
+    data = PriceResponse.model_validate_json(response.content)
+    return [f"AAPL Price: ${data.price:.2f}"]
+
+
+async def check_balance(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    response = await client.get(f"{base_url}/balance")
+    response.raise_for_status()
+    data = BalanceResponse.model_validate_json(response.content)
+    return [f"Balance: ${data.balance:,.2f}"]
+
+
+async def check_buy(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    trade_data = {"symbol": "AAPL", "side": "buy", "quantity": 1}
+    response = await client.post(f"{base_url}/trade", json=trade_data)
+    response.raise_for_status()
+    data = TradeResponse.model_validate_json(response.content)
+    assert data.status == 'success'
+    return [f"Bought 1 share at ${data.trade['price']:.2f}"]
+
+
+async def check_holdings(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    response = await client.get(f"{base_url}/holdings")
+    response.raise_for_status()
+    data = HoldingsResponse.model_validate_json(response.content)
+    assert len(data.holdings) > 0
+    return [
+        f"Holdings: {len(data.holdings)} position(s)",
+        f"Portfolio Value: ${data.total_portfolio_value:,.2f}"
+    ]
+
+
+async def check_sell(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    trade_data = {"symbol": "AAPL", "side": "sell", "quantity": 1}
+    response = await client.post(f"{base_url}/trade", json=trade_data)
+    response.raise_for_status()
+    data = TradeResponse.model_validate_json(response.content)
+    assert data.status == 'success'
+    return [f"Sold 1 share at ${data.trade['price']:.2f}"]
+
+
+async def check_history(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    params = {"symbol": "AAPL", "resolution": "1d", "limit": 5}
+    response = await client.get(f"{base_url}/history", params=params)
+    response.raise_for_status()
+    data = HistoryResponse.model_validate_json(response.content)
+    assert len(data.history) > 0
+    return [f"Retrieved {data.count} candles"]
+
+
+async def check_market_status(client: httpx.AsyncClient, base_url: str) -> List[str]:
+    response = await client.get(f"{base_url}/market_status", params={"symbol": "AAPL"})
+    response.raise_for_status()
+    data = MarketStatusResponse.model_validate_json(response.content)
+    return [f"Market Open: {data.isOpen}"]
+
+
+# (title, name, check, independent) in report order. Independent checks are
+# read-only and start together up front; the buy -> holdings -> sell sequence
+# depends on its own order and runs serially once the balance check has passed
+TESTS = [
+    ("Testing health endpoint", "Health check", check_health, True),
+    ("Testing /price endpoint", "Price endpoint", check_price, True),
+    ("Testing /balance endpoint", "Balance endpoint", check_balance, True),
+    ("Testing /trade endpoint (BUY)", "Buy trade", check_buy, False),
+    ("Testing /holdings endpoint", "Holdings endpoint", check_holdings, False),
+    ("Testing /trade endpoint (SELL)", "Sell trade", check_sell, False),
+    ("Testing /history endpoint", "History endpoint", check_history, True),
+    ("Testing /market_status endpoint", "Market status", check_market_status, True),
+]
+
+
+async def _attempt(check: Callable[..., Awaitable[List[str]]], client: httpx.AsyncClient,
+                   base_url: str) -> Tuple[bool, Any]:
+    """Run a check, returning (True, detail lines) or (False, the error)."""
+    try:
+        return True, await check(client, base_url)
+    except Exception as e:
+        return False, e
 
 
-def test_api(api_key: str, base_url: str = "http://localhost:8000/api"):
+async def test_api(api_key: str, base_url: str = "http://localhost:8000/api"):
     """Test all API endpoints."""
+    # One keep-alive client for every request instead of a new connection per call
     headers = {"Authorization": f"Bearer {api_key}"}
-
-    print("🧪 Testing Stock Trading API\n")
-    print(f"Base URL: {base_url}")
-    print(f"API Key: {api_key[:10]}...\n")
+    limits = httpx.Limits(max_connections=CONCURRENT_CHECKS)
+    async with httpx.AsyncClient(headers=headers, limits=limits, http2=True) as client:
+        # Collect the report and write it once rather than printing line by line
+        out: List[str] = []
+        try:
+            return await _run_tests(client, out, api_key, base_url)
+        finally:
+            sys.stdout.write("\n".join(out) + "\n")
+            sys.stdout.flush()
+
+
+async def _run_tests(client: httpx.AsyncClient, out: List[str], api_key: str, base_url: str):
+    """Run each endpoint test over the given client, appending the report to `out`."""
+    out.append("🧪 Testing Stock Trading API\n")
+    out.append(f"Base URL: {base_url}")
+    out.append(f"API Key: {api_key[:10]}...\n")
 
     tests_passed = 0
     tests_failed = 0
 
-    # Test 1: Health Check
-    print("1. Testing health endpoint...")
-    try:
-        response = requests.get(f"{base_url.replace('/api', '')}/health")
-        response.raise_for_status()
-        print("   ✅ Health check passed\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Health check failed: {e}\n")
-        tests_failed += 1
-
-    # Test 2: Price Endpoint
-    print("2. Testing /price endpoint...")
-    try:
-        response = requests.get(f"{base_url}/price", params={"symbol": "AAPL"}, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert "symbol" in data
-        assert "price" in data
-        assert "market" in data
-        print(f"   ✅ Price endpoint passed")
-        print(f"   AAPL Price: ${data['price']:.2f}\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Price endpoint failed: {e}\n")
-        tests_failed += 1
-
-    # Test 3: Balance Endpoint
-    print("3. Testing /balance endpoint...")
-    try:
-        response = requests.get(f"{base_url}/balance", headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert "balance" in data
-        initial_balance = data['balance']
-        print(f"   ✅ Balance endpoint passed")
-        print(f"   Balance: ${initial_balance:,.2f}\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Balance endpoint failed: {e}\n")
-        tests_failed += 1
-        return
-
-    # Test 4: Trade Endpoint (Buy)
-    print("4. Testing /trade endpoint (BUY)...")
-    try:
-        trade_data = {"symbol": "AAPL", "side": "buy", "quantity": 1}
-        response = requests.post(f"{base_url}/trade", json=trade_data, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert data['status'] == 'success'
-        print(f"   ✅ Buy trade passed")
-        print(f"   Bought 1 share at ${data['trade']['price']:.2f}\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Buy trade failed: {e}\n")
-        tests_failed += 1
-
-    # Test 5: Holdings Endpoint
-    print("5. Testing /holdings endpoint...")
-    try:
-        response = requests.get(f"{base_url}/holdings", headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert "holdings" in data
-        assert "total_portfolio_value" in data
-        assert len(data['holdings']) > 0
-        print(f"   ✅ Holdings endpoint passed")
-        print(f"   Holdings: {len(data['holdings'])} position(s)")
-        print(f"   Portfolio Value: ${data['total_portfolio_value']:,.2f}\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Holdings endpoint failed: {e}\n")
-        tests_failed += 1
-
-    # Test 6: Trade Endpoint (Sell)
-    print("6. Testing /trade endpoint (SELL)...")
-    try:
-        trade_data = {"symbol": "AAPL", "side": "sell", "quantity": 1}
-        response = requests.post(f"{base_url}/trade", json=trade_data, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert data['status'] == 'success'
-        print(f"   ✅ Sell trade passed")
-        print(f"   Sold 1 share at ${data['trade']['price']:.2f}\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Sell trade failed: {e}\n")
-        tests_failed += 1
-
-    # Test 7: History Endpoint
-    print("7. Testing /history endpoint...")
-    try:
-        params = {"symbol": "AAPL", "resolution": "1d", "limit": 5}
-        response = requests.get(f"{base_url}/history", params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert "history" in data
-        assert len(data['history']) > 0
-        print(f"   ✅ History endpoint passed")
-        print(f"   Retrieved {data['count']} candles\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ History endpoint failed: {e}\n")
-        tests_failed += 1
-
-    # Test 8: Market Status Endpoint
-    print("8. Testing /market_status endpoint...")
-    try:
-        response = requests.get(f"{base_url}/market_status", params={"symbol": "AAPL"}, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        assert "isOpen" in data
-        print(f"   ✅ Market status passed")
-        print(f"   Market Open: {data['isOpen']}\n")
-        tests_passed += 1
-    except Exception as e:
-        print(f"   ❌ Market status failed: {e}\n")
-        tests_failed += 1
+    tasks = {
+        check: asyncio.create_task(_attempt(check, client, base_url))
+        for _, _, check, independent in TESTS
+        if independent
+    }
+
+    for number, (title, name, check, independent) in enumerate(TESTS, start=1):
+        out.append(f"{number}. {title}...")
+        passed, outcome = await (tasks[check] if independent else _attempt(check, client, base_url))
+
+        if passed:
+            out.append(f"   ✅ {name} passed")
+            for line in outcome:
+                out.append(f"   {line}")
+            out.append("")
+            tests_passed += 1
+        else:
+            out.append(f"   ❌ {name} failed: {outcome}\n")
+            tests_failed += 1
+
+            # Without a working account there's no point trading
+            if check is check_balance:
+                for task in tasks.values():
+                    task.cancel()
+                return
 
     # Summary
-    print("=" * 50)
-    print("TEST SUMMARY")
-    print("=" * 50)
-    print(f"Tests Passed: {tests_passed}")
-    print(f"Tests Failed: {tests_failed}")
-    print(f"Total Tests:  {tests_passed + tests_failed}")
+    out.append("=" * 50)
+    out.append("TEST SUMMARY")
+    out.append("=" * 50)
+    out.append(f"Tests Passed: {tests_passed}")
+    out.append(f"Tests Failed: {tests_failed}")
+    out.append(f"Total Tests:  {tests_passed + tests_failed}")
 
     if tests_failed == 0:
-        print("\n🎉 All tests passed! Your API is working correctly!")
+        out.append("\n🎉 All tests passed! Your API is working correctly!")
         return True
     else:
-        print(f"\n⚠️  {tests_failed} test(s) failed. Please check the errors above.")
+        out.append(f"\n⚠️  {tests_failed} test(s) failed. Please check the errors above.")
         return False
 
 
@@ -168,7 +195,7 @@ if __name__ == "__main__":
     base_url = sys.argv[2] if len(sys.argv) > 2 else "http://localhost:8000/api"
 
     try:
-        success = test_api(api_key, base_url)
+        success = asyncio.run(test_api(api_key, base_url))
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\nTests interrupted by user.")
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read when app.config is imported, so point the app at a scratch
+# SQLite database before any test module imports it
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
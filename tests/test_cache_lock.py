@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+from redis.exceptions import RedisError
+
+from app import cache
+
+
+class FakeLock:
+    def __init__(self, acquired: bool):
+        self.acquired = acquired
+
+    async def acquire(self, blocking: bool) -> bool:
+        return self.acquired
+
+    async def release(self) -> None:
+        pass
+
+
+class FakeRedis:
+    def __init__(self, lock: FakeLock):
+        self._lock = lock
+
+    def lock(self, name: str, timeout: int) -> FakeLock:
+        return self._lock
+
+
+async def _raise_inside_lock():
+    async with cache.cache_lock("price:AAPL", timeout=5) as held:
+        assert held is False
+        raise RedisError("cache read failed")
+
+
+def test_cache_lock_propagates_redis_errors_when_not_held(monkeypatch):
+    monkeypatch.setattr(cache, "redis_client", FakeRedis(FakeLock(acquired=False)))
+
+    with pytest.raises(RedisError):
+        asyncio.run(_raise_inside_lock())
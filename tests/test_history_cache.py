@@ -0,0 +1,77 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+import orjson
+from fastapi.testclient import TestClient
+
+from app.database import Base, engine
+from app.main import app
+from app.market_data import get_http_client
+from app.models import MarketType
+from app.routes import _cache_candles
+
+DAY = 86400
+
+
+def _daily_candles(newest: int, count: int) -> list:
+    return [
+        {'timestamp': newest - i * DAY, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100.0}
+        for i in range(count)
+    ]
+
+
+def _get_history(symbol: str, limit: int):
+    """Request daily history; returns (response JSON, upstream requests made)."""
+    upstream_calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upstream_calls.append(request)
+        # The newest `limit` trading days, up to and including today
+        series = {
+            datetime.fromtimestamp(time.time() - i * DAY, timezone.utc).date().isoformat(): {
+                '1. open': '1', '2. high': '2', '3. low': '0.5', '4. close': '1.5', '5. volume': '100'
+            }
+            for i in range(limit)
+        }
+        return httpx.Response(200, content=orjson.dumps({'Time Series (Daily)': series}))
+
+    app.dependency_overrides[get_http_client] = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            api_key = client.post('/api/register', json={}).json()['api_key']
+            response = client.get(
+                '/api/history',
+                params={'symbol': symbol, 'resolution': '1d', 'limit': limit},
+                headers={'Authorization': f'Bearer {api_key}'}
+            )
+    finally:
+        app.dependency_overrides.pop(get_http_client)
+
+    assert response.status_code == 200
+    return response.json(), upstream_calls
+
+
+def test_history_serves_fresh_cached_candles():
+    Base.metadata.create_all(bind=engine)
+    today = int(time.time()) // DAY * DAY
+    asyncio.run(_cache_candles('FRESHBARS', MarketType.STOCK, 'D', _daily_candles(today, 5)))
+
+    data, upstream_calls = _get_history('FRESHBARS', limit=5)
+
+    assert data['source'] == 'cache'
+    assert upstream_calls == []
+
+
+def test_history_refetches_stale_cached_candles():
+    Base.metadata.create_all(bind=engine)
+    # Enough rows to satisfy the limit, but the newest is a month old
+    month_ago = int(time.time()) // DAY * DAY - 30 * DAY
+    asyncio.run(_cache_candles('STALEBARS', MarketType.STOCK, 'D', _daily_candles(month_ago, 5)))
+
+    data, upstream_calls = _get_history('STALEBARS', limit=5)
+
+    assert data['source'] == 'alpha_vantage'
+    assert len(upstream_calls) == 1
+    assert data['history'][-1]['timestamp'] == int(time.time()) // DAY * DAY
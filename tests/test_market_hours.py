@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from app.market_data import ET, _is_open_at
+from app.models import MarketType
+
+
+def _minute_bucket(hour: int, minute: int, second: int = 0) -> int:
+    # Wednesday, so only the time of day matters
+    moment = datetime(2024, 1, 10, hour, minute, second, tzinfo=ET)
+    return int(moment.timestamp() // 60)
+
+
+@pytest.mark.parametrize("hour, minute, second, is_open", [
+    (9, 29, 59, False),
+    (9, 30, 0, True),
+    (15, 59, 59, True),
+    (16, 0, 0, False),
+    (16, 0, 30, False),
+])
+def test_stock_market_hours(hour, minute, second, is_open):
+    assert _is_open_at(MarketType.STOCK, _minute_bucket(hour, minute, second)) is is_open
@@ -0,0 +1,66 @@
+import httpx
+import orjson
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import cache, routes
+from app.database import Base, engine, SessionLocal
+from app.main import app
+from app.market_data import get_http_client
+from app.models import PriceCache, Symbol
+
+
+class FakeLock:
+    async def acquire(self, blocking: bool) -> bool:
+        return True
+
+    async def release(self) -> None:
+        pass
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio client (TTLs are ignored)."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def lock(self, name, timeout):
+        return FakeLock()
+
+
+def test_redis_hits_do_not_write_price_cache_rows(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", redis)
+    monkeypatch.setattr(routes, "redis_client", redis)
+
+    upstream_calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upstream_calls.append(request)
+        return httpx.Response(200, content=orjson.dumps({'Global Quote': {'05. price': '101.5'}}))
+
+    app.dependency_overrides[get_http_client] = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            api_key = client.post('/api/register', json={}).json()['api_key']
+            headers = {'Authorization': f'Bearer {api_key}'}
+            for _ in range(5):
+                assert client.get('/api/price', params={'symbol': 'REDISHIT'}, headers=headers).status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_http_client)
+
+    with SessionLocal() as db:
+        rows = db.scalar(
+            select(func.count()).select_from(PriceCache).join(Symbol, PriceCache.symbol_id == Symbol.id)
+            .where(Symbol.text == 'REDISHIT')
+        )
+
+    assert len(upstream_calls) == 1
+    assert rows == 1